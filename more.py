@@ -18,86 +18,154 @@ with open("long.txt", "w") as f:
 """
 
 import curses
-import math
 import argparse
+import codecs
+import collections.abc
 import io
 import os
-import collections
 
-def read_from_file(ptr: io.TextIOWrapper, buffer: collections.deque[str], n_lines: int, n_cols: int) -> tuple[int, list[str]]:
+# Keys that take us to the next page and the key that quits
+ADVANCE_KEYS = frozenset({ord(' '), curses.KEY_DOWN, curses.KEY_ENTER, ord('\n'), ord('\r')})
+QUIT = ord('q')
+
+# Keys that repaint the page we are on, sent when the terminal is resized or on 'Ctrl-L'
+REDRAW_KEYS = frozenset({curses.KEY_RESIZE, ord('\x0c')})
+
+# Reads are made in whole multiples of this size, one read usually covers several pages
+READ_SIZE = 64 * 1024
+
+# How far ahead of the current read we ask the kernel to prefetch the file
+READAHEAD_SIZE = 128 * 1024
+
+def read_chunks(ptr: io.FileIO, file_size: int, chunk_size: int) -> collections.abc.Iterator[str]:
+    """
+    Reads the file in chunks of `chunk_size` bytes, one system call each, and yields them decoded.
+    We keep track of our offset in the file so that we never ask for bytes beyond `file_size`.
+    Incremental decoder holds on to multi-byte characters and '\\r\\n' pairs split across two reads.
+    """
+
+    # We only ever read the file front to back, let the kernel know so that it reads ahead
+    # more aggressively. posix_fadvise is not available on every platform (Windows, macOS)
+    fd, can_advise = ptr.fileno(), hasattr(os, "posix_fadvise")
+    if can_advise:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+    file_offset = 0
+    while file_offset < file_size:
+        raw = ptr.read(min(chunk_size, file_size - file_offset))
+
+        # File was truncated while we were reading it
+        if not raw:
+            break
+        file_offset += len(raw)
+
+        # While the user is paging through this chunk, have the kernel fetch what comes after it
+        if can_advise and file_offset < file_size:
+            os.posix_fadvise(fd, file_offset, READAHEAD_SIZE, os.POSIX_FADV_WILLNEED)
+
+        yield decoder.decode(raw)
+
+    yield decoder.decode(b"", final=True)
+
+def wrap_text(text: str, n_lines: int, n_cols: int) -> tuple[int, int, str, int]:
     """
-    Reads from the file pointer only as much as neccessary, based on n_lines, n_cols and existing text in the buffer.
-    Buffer holds the data that was previously read but couldn't fit into the screen.
-    Before reading any new text, we try exhaust text in the buffer.
+    Wraps text into at most n_lines lines of at most n_cols characters each, text that
+    doesn't fill up the screen is taken to be the end of the file.
 
     Why / when do we insert line breaks?
     - When the current line contains characters beyond what a line on screen can show
     - When a line break is encountered in the text being read (for formatting purposes, we leave it untouched)
 
-    Buffer deque is modified in place.
-    We return the count of line breaks we have inserted so far, along with the actual text to be displayed.
+    Lines are cut out of the text with `str.split` and slicing, so no Python code runs per character.
+    We return the count of line breaks we have inserted, the count of lines on screen, the actual text to be displayed
+    along with the count of characters of text that went into it.
     """
 
-    line_breaks_inserted = 0
-    lines: list[str] = []
-    line: list[str] = []
-    while buffer and n_lines > 0:
-        curr_line = buffer.popleft()
-        curr_line_length = len(curr_line)
-
-        # If the current line is of the right width or if it contains a
-        # line break, we have inserted a single line to our screen
-        if curr_line_length == n_cols or curr_line[-1] in ("\n", "\r"):
-            lines.append(curr_line)
-            n_lines -= 1
-
-        # Only time this would be executed is when the buffer is exhausted,
-        # we have some line that is shorter that our screen width.
-        else:
-            line = list(curr_line)
-
-    # After exhausting buffer, if we still have more lines that the screen can fit
-    if n_lines > 0:
-        # Read as much as neccessary
-        for ch in ptr.read(n_cols * n_lines):
-            line.append(ch)
-
-            # At each iteration we check if we have encountered a line break
-            # If not, check if the accumulated characters would cover the width of the screen
-            # In either of the cases, we are done for that particular line
-            # Append that line and clear the accumulating variable for the next line
-
-            # We have to be careful to only insert as much into our `lines` as it can hold
-            # If we have read beyond it, we start accumulating the excess into our buffer
-
-            if line[-1] in ('\n', '\r'):
-                if n_lines > 0:
-                    lines.append(''.join(line))
-                    n_lines -= 1
-                else:
-                    buffer.append(''.join(line))
-                line.clear()
-
-            elif len(line) == n_cols:
-                prev = line.pop()
-                line.append("\n")
-                line_breaks_inserted += 1
-                if n_lines > 0:
-                    lines.append(''.join(line))
-                    n_lines -= 1
-                else:
-                    buffer.append(''.join(line))
-                line = [prev]
-
-        # We reached end of buffer but line doesn't have an end (\n) or the required width
-        if line:
-            if n_lines > 0:
-                lines.append(''.join(line))
-                n_lines -= 1
-            else:
-                buffer.append(''.join(line))
-
-    return line_breaks_inserted, lines
+    # Chunks are decoded with universal newlines, '\r' and '\r\n' reach us as '\n'. We split on it alone,
+    # `str.splitlines` would also break on characters like '\v' and '\f' that don't start a new line on screen.
+    # Every line of text yields at least a line on screen, so we never need more than n_lines of them
+    head = text[:n_lines * n_cols]
+    source_lines = head.split('\n', n_lines)
+    rest = source_lines.pop()
+
+    # Fast path: when none of the lines that make up the screen are wider than it, there is nothing
+    # to wrap. We never split beyond what a screen can hold, so falling back to the slow path costs little
+    if len(source_lines) == n_lines and max(map(len, source_lines), default=0) < n_cols:
+        consumed = len(head) - len(rest)
+        return 0, n_lines, head[:consumed], consumed
+
+    # Every line on screen is written into pre-allocated slots, joining them at the end
+    # allocates the text to be displayed exactly once. Lines take up two slots, the slice
+    # of text and the line break after it, so the slice is never copied
+    line_breaks_inserted, lines_read, consumed, slot, wrap_width = 0, 0, 0, 0, n_cols - 1
+    lines: list[str] = [''] * (2 * n_lines)
+
+    # Text left over after the last line break is the only line without one, we only
+    # get to display its remainder when we have reached the end of file
+    source_lines.append(rest)
+    last_line = len(source_lines) - 1
+    for i, line in enumerate(source_lines):
+        pos, line_length = 0, len(line)
+
+        # Line is wider than the screen, we cut it short and insert a line break
+        # in place of the last character that would fit on screen
+        while line_length - pos >= n_cols and lines_read < n_lines:
+            lines[slot], lines[slot + 1] = line[pos:pos + wrap_width], '\n'
+            pos, slot, lines_read = pos + wrap_width, slot + 2, lines_read + 1
+            line_breaks_inserted += 1
+
+        if lines_read == n_lines:
+            consumed += pos
+            break
+
+        # Whatever remains of the line fits on screen, we leave its line break untouched
+        if i < last_line:
+            lines[slot], lines[slot + 1] = line[pos:], '\n'
+            consumed, slot, lines_read = consumed + line_length + 1, slot + 2, lines_read + 1
+
+        # We reached end of file but line doesn't have an end (\n) or the required width
+        elif pos < line_length:
+            lines[slot] = line[pos:]
+            consumed, lines_read = consumed + line_length, lines_read + 1
+
+    return line_breaks_inserted, lines_read, ''.join(lines), consumed
+
+def read_from_file(chunks: collections.abc.Iterator[str], leftover: str, n_lines: int, n_cols: int) -> tuple[int, int, str, str]:
+    """
+    Reads from the file chunks only as much as neccessary, based on n_lines, n_cols and the leftover text.
+    Leftover holds the data that was previously read but couldn't fit into the screen.
+    Before reading any new text, we try exhaust the leftover text.
+
+    We return the count of line breaks we have inserted so far, the count of lines on screen, the actual text to be displayed
+    along with the text that is left over for the next read. Leftover text is only ever empty once the file has ended.
+    """
+
+    # Every line on screen consumes at most `n_cols` characters of text, so holding
+    # this many characters guarantees we can fill the screen unless the file has ended
+    n_chars = n_cols * n_lines
+    chunk = leftover
+    while len(chunk) < n_chars:
+        # Multi-byte characters and '\r\n' pairs decode into fewer characters than the bytes read,
+        # so we might need more than a single chunk. Running out of chunks means we are at the end of file
+        more = next(chunks, None)
+        if more is None:
+            break
+        chunk += more
+
+    # Whatever couldn't fit into the screen is saved for the next read
+    line_breaks_inserted, lines_read, display_text, consumed = wrap_text(chunk, n_lines, n_cols)
+    leftover = chunk[consumed:]
+
+    # When the screen used up all of the text, we pull the next chunk in right away. This way
+    # an empty leftover tells the caller that the file has ended, whatever its encoding or line endings
+    while not leftover:
+        more = next(chunks, None)
+        if more is None:
+            break
+        leftover = more
+
+    return line_breaks_inserted, lines_read, display_text, leftover
 
 def main(stdscr: curses.window, args) -> None:
 
@@ -112,7 +180,11 @@ def main(stdscr: curses.window, args) -> None:
     FILE_SIZE, PADDING = os.path.getsize(args.fname), 4
     TEXTBOX_ROWS, TEXTBOX_COLS = ROWS - PADDING, COLS - PADDING
 
-    text_pointer: io.TextIOWrapper = open(args.fname, "r")
+    # We do our own buffering, each chunk is read straight from the file with a single system call.
+    # Chunk size is rounded up to a multiple of READ_SIZE, surplus is carried over as leftover text
+    text_pointer: io.FileIO = open(args.fname, "rb", buffering=0)
+    chunk_size = ((TEXTBOX_ROWS - 1) * TEXTBOX_COLS + READ_SIZE - 1) // READ_SIZE * READ_SIZE
+    chunks = read_chunks(text_pointer, FILE_SIZE, chunk_size)
 
     stdscr.clear()
     stdscr.refresh()
@@ -122,34 +194,52 @@ def main(stdscr: curses.window, args) -> None:
     infobox.addstr("Exit: 'q'")
     infobox.refresh()
 
-    read_count = 0
+    read_count, last_percentage = 0, -1.0
     ch = ord(' ')
-    buffer: collections.deque[str] = collections.deque([])
+    A_REVERSE = curses.A_REVERSE
+    leftover, end_of_file = "", FILE_SIZE == 0
     while True:
 
         # We read from file the first time and every subsequent time as long as
         # a 'space', 'newline', 'keydown' characters are hit. This can only
-        # happen until we have data still left in our file *or* in our buffer.
-        if ch in (ord(' '), curses.KEY_DOWN, curses.KEY_ENTER, ord('\n'), ord('\r')) and (read_count < FILE_SIZE or len(buffer) > 0):
-            line_breaks_inserted, lines = read_from_file(text_pointer, buffer, TEXTBOX_ROWS - 1, TEXTBOX_COLS)
-            display_text = ''.join(lines)
+        # happen until the file has ended. We can't tell that by comparing characters read
+        # to the file size, UTF-8 and '\r\n' files decode into fewer characters than bytes
+        if ch in ADVANCE_KEYS and not end_of_file:
+            line_breaks_inserted, lines_read, display_text, leftover = read_from_file(chunks, leftover, TEXTBOX_ROWS - 1, TEXTBOX_COLS)
+            end_of_file = not leftover
 
             # There was some confusion on how to handle extra line breaks inserted
             # to reflect proper percentage completion. We are resorting to incrementing
             # the file size by the amount of line breaks that we are inserting
             read_count, FILE_SIZE = read_count + len(display_text), FILE_SIZE + line_breaks_inserted
-            percentage_completion = (read_count / FILE_SIZE) * 100
+            percentage_completion = round((read_count / FILE_SIZE) * 100, 2)
 
-            # When we are at buffer end, we might have text that only partially
-            # cover our screen. In these cases, we would need to clear the screen
-            if read_count >= FILE_SIZE:
-                textbox.clear()
+            # Every line we write ends in a line break, which clears the rest of the line on screen.
+            # Only at the end of file might we have text that partially covers our screen, in these
+            # cases we erase the window first. Unlike clear(), erase() doesn't force curses to
+            # repaint the entire terminal, it only sends what has changed
+            if lines_read < TEXTBOX_ROWS - 1 or display_text[-1:] != '\n':
+                textbox.erase()
 
             textbox.addstr(0, 0, display_text)
-            stdscr.addstr(ROWS - 1, 0, f"--MORE-- {percentage_completion:.2f}%", curses.A_REVERSE)
+
+            # Percentage shown only has two decimals, we skip redrawing it when those haven't changed
+            if percentage_completion != last_percentage:
+                stdscr.addstr(ROWS - 1, 0, f"--MORE-- {percentage_completion:.2f}%", A_REVERSE)
+                last_percentage = percentage_completion
+
             textbox.refresh()
 
-        elif ch == ord('q'):
+        # Curses still holds the page we last rendered in its windows, we repaint
+        # it from there rather than reading and wrapping the text once again
+        elif ch in REDRAW_KEYS:
+            stdscr.clearok(True)
+            for window in (stdscr, textbox, infobox):
+                window.touchwin()
+                window.noutrefresh()
+            curses.doupdate()
+
+        elif ch == QUIT:
             break
 
         ch = stdscr.getch()